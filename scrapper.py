@@ -12,6 +12,13 @@ import pandas as pd
 import os
 import re
 import zipfile
+import json
+import socket
+import errno
+import urllib.request
+import urllib.error
+from urllib.parse import urlparse, quote
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # Logging setup
 logging.basicConfig(
@@ -20,6 +27,247 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Residential proxy, shared by the browser and the website probes
+proxy_host = "pr.oxylabs.io"
+proxy_port = "7777"
+proxy_user = "your-username"
+proxy_pass = "your-password"
+
+# Website reachability prefilter settings
+PROBE_USE_PROXY = True  # Probe through the proxy above, like the browser
+DEAD_DOMAIN_CACHE_FILE = 'dead_domains.json'
+DEAD_DOMAIN_TTL = 7 * 24 * 3600  # Re-check dead/parked domains after a week
+TIMEOUT_TTL = 3600  # Timeouts are often transient, so re-check them sooner
+PROBE_ATTEMPTS = 2  # Retry timeouts before giving up on a site
+PROBE_TIMEOUT = 5
+PROBE_WORKERS = 16
+PROBE_MAX_BYTES = 256 * 1024  # Enough HTML for <head> assets and generator tags
+PROBE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+}
+PARKING_HOSTS = [
+    'sedoparking.com', 'parkingcrew.net', 'bodis.com', 'dan.com', 'afternic.com',
+    'hugedomains.com', 'above.com', 'parklogic.com', 'domainmarket.com', 'undeveloped.com'
+]
+# Hosts that serve many businesses by path, so one failure says nothing about the others
+SHARED_HOSTS = [
+    'facebook.com', 'instagram.com', 'linktr.ee', 'sites.google.com', 'etsy.com',
+    'twitter.com', 'x.com', 'tiktok.com', 'ebay.co.uk', 'amazon.co.uk'
+]
+PARKED_MARKERS = [
+    'this domain is for sale', 'domain is parked', 'buy this domain',
+    'this domain may be for sale', 'domain has expired'
+]
+
+# Payment method keywords, also the vocabulary for the payment_methods bitmask
+PAYMENT_ICONS = {
+    'visa': ['visa', 'cc-visa'],
+    'mastercard': ['mastercard', 'cc-mastercard'],
+    'amex': ['american express', 'amex', 'cc-amex'],
+    'discover': ['discover', 'cc-discover'],
+    'paypal': ['paypal'],
+    'apple pay': ['apple pay'],
+    'google pay': ['google pay'],
+    'amazon pay': ['amazon pay'],
+    'klarna': ['klarna'],
+    'afterpay': ['afterpay'],
+    'bitcoin': ['bitcoin', 'crypto'],
+    'bank transfer': ['bank transfer', 'wire transfer'],
+    'cash on delivery': ['cash on delivery', 'cod']
+}
+
+# HTTP fingerprints, matched as lowercase substrings
+SERVER_SIGNATURES = {
+    'nginx': {'WebServer': 'Nginx'},
+    'openresty': {'WebServer': 'OpenResty'},
+    'apache': {'WebServer': 'Apache'},
+    'microsoft-iis': {'WebServer': 'IIS', 'ProgrammingLanguage': 'ASP.NET'},
+    'litespeed': {'WebServer': 'LiteSpeed'},
+    'caddy': {'WebServer': 'Caddy'},
+    'gunicorn': {'WebServer': 'Gunicorn', 'ProgrammingLanguage': 'Python'},
+    'kestrel': {'WebServer': 'Kestrel', 'ProgrammingLanguage': 'ASP.NET'},
+    'squarespace': {'CMS': 'Squarespace'},
+    'pepyaka': {'CMS': 'Wix'}
+}
+POWERED_BY_SIGNATURES = {
+    'php': {'ProgrammingLanguage': 'PHP'},
+    'asp.net': {'ProgrammingLanguage': 'ASP.NET'},
+    'express': {'ProgrammingLanguage': 'Node.js'},
+    'next.js': {'ProgrammingLanguage': 'Node.js', 'JavaScriptFramework': 'Next.js'},
+    'nuxt': {'ProgrammingLanguage': 'Node.js', 'JavaScriptFramework': 'Nuxt.js'},
+    'servlet': {'ProgrammingLanguage': 'Java'},
+    'wp engine': {'CMS': 'WordPress', 'ProgrammingLanguage': 'PHP'},
+    'shopify': {'CMS': 'Shopify', 'EcommercePlatform': 'Shopify'}
+}
+COOKIE_SIGNATURES = {
+    'phpsessid': {'ProgrammingLanguage': 'PHP'},
+    'laravel_session': {'ProgrammingLanguage': 'PHP'},
+    'jsessionid': {'ProgrammingLanguage': 'Java'},
+    'asp.net_sessionid': {'ProgrammingLanguage': 'ASP.NET'},
+    'connect.sid': {'ProgrammingLanguage': 'Node.js'},
+    '_shopify_y': {'CMS': 'Shopify', 'EcommercePlatform': 'Shopify'},
+    '_shopify_s': {'CMS': 'Shopify', 'EcommercePlatform': 'Shopify'},
+    'wp-settings': {'CMS': 'WordPress', 'ProgrammingLanguage': 'PHP'},
+    'woocommerce_': {'EcommercePlatform': 'WooCommerce', 'ProgrammingLanguage': 'PHP'},
+    'prestashop-': {'EcommercePlatform': 'PrestaShop', 'ProgrammingLanguage': 'PHP'},
+    'form_key': {'CMS': 'Magento', 'EcommercePlatform': 'Magento', 'ProgrammingLanguage': 'PHP'},
+    'svsession': {'CMS': 'Wix'}
+}
+GENERATOR_SIGNATURES = {
+    'wordpress': {'CMS': 'WordPress', 'ProgrammingLanguage': 'PHP'},
+    'woocommerce': {'EcommercePlatform': 'WooCommerce'},
+    'joomla': {'CMS': 'Joomla', 'ProgrammingLanguage': 'PHP'},
+    'drupal': {'CMS': 'Drupal', 'ProgrammingLanguage': 'PHP'},
+    'wix.com': {'CMS': 'Wix'},
+    'squarespace': {'CMS': 'Squarespace'},
+    'prestashop': {'EcommercePlatform': 'PrestaShop', 'ProgrammingLanguage': 'PHP'},
+    'magento': {'CMS': 'Magento', 'EcommercePlatform': 'Magento', 'ProgrammingLanguage': 'PHP'},
+    'ekm': {'EcommercePlatform': 'EKM'},
+    'webflow': {'CMS': 'Webflow'}
+}
+ASSET_SIGNATURES = {
+    'cdn.shopify.com': {'CMS': 'Shopify', 'EcommercePlatform': 'Shopify'},
+    '/wp-content/': {'CMS': 'WordPress', 'ProgrammingLanguage': 'PHP'},
+    '/wp-includes/': {'CMS': 'WordPress', 'ProgrammingLanguage': 'PHP'},
+    '/plugins/woocommerce/': {'EcommercePlatform': 'WooCommerce'},
+    '/static/version': {'CMS': 'Magento', 'EcommercePlatform': 'Magento'},
+    'squarespace.com': {'CMS': 'Squarespace'},
+    'static.wixstatic.com': {'CMS': 'Wix'},
+    'bigcommerce.com': {'EcommercePlatform': 'BigCommerce'},
+    'js.stripe.com': {'PaymentGateway': 'Stripe'},
+    'paypal.com/sdk': {'PaymentGateway': 'PayPal'},
+    'googletagmanager.com/gtag': {'Analytics': 'Google Analytics (gtag)'},
+    'google-analytics.com': {'Analytics': 'Google Analytics'},
+    'connect.facebook.net': {'Analytics': 'Facebook Pixel'},
+    '/_next/': {'JavaScriptFramework': 'Next.js', 'ProgrammingLanguage': 'Node.js'},
+    '/_nuxt/': {'JavaScriptFramework': 'Nuxt.js', 'ProgrammingLanguage': 'Node.js'}
+}
+
+TECH_STACK_COLUMNS = {
+    'CMS': 'tech_cms',
+    'EcommercePlatform': 'tech_ecommerce_platform',
+    'ProgrammingLanguage': 'tech_programming_language',
+    'WebServer': 'tech_web_server',
+    'JavaScriptFramework': 'tech_javascript_framework',
+    'Analytics': 'tech_analytics',
+    'PaymentGateway': 'tech_payment_gateway'
+}
+RECORD_COLUMNS = [
+    'search_category', 'search_county', 'business_name', 'google_rating', 'review_count',
+    'full_address', 'primary_phone', 'website_url', 'website_status', 'contact_email'
+] + list(TECH_STACK_COLUMNS.values()) + ['payment_methods']
+# Low-cardinality columns stored as pandas categoricals (codes + one copy of each value)
+CATEGORICAL_COLUMNS = [
+    'search_category', 'search_county', 'website_status'
+] + list(TECH_STACK_COLUMNS.values())
+PAYMENT_METHODS = list(PAYMENT_ICONS)
+
+class BusinessRecord:
+    """A single business listing with parsed, typed fields"""
+    __slots__ = (
+        'name', 'rating', 'review_count', 'address', 'phone', 'website', 'website_status',
+        'email', 'tech_stack', 'http_tech_stack', 'payment_methods', 'category', 'county'
+    )
+
+    def __init__(self, name):
+        self.name = name
+        self.rating = None          # float
+        self.review_count = None    # int
+        self.address = None
+        self.phone = None
+        self.website = None
+        self.website_status = None  # 'live', 'unresolved', 'unreachable', 'timeout' or 'parked'
+        self.email = None
+        self.tech_stack = None      # dict keyed like TECH_STACK_COLUMNS
+        self.http_tech_stack = None  # prefilter header/cookie/generator/asset matches, cleared after enrichment
+        self.payment_methods = None  # list of PAYMENT_METHODS entries
+        self.category = None
+        self.county = None
+
+class RecordBuffer:
+    """Columnar buffer of business records, flushed to disk with typed columns"""
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self.columns['business_name'])
+
+    def clear(self):
+        self.columns = {column: [] for column in RECORD_COLUMNS}
+
+    def append(self, record):
+        columns = self.columns
+        columns['search_category'].append(record.category)
+        columns['search_county'].append(record.county)
+        columns['business_name'].append(record.name)
+        columns['google_rating'].append(record.rating)
+        columns['review_count'].append(record.review_count)
+        columns['full_address'].append(record.address)
+        columns['primary_phone'].append(record.phone)
+        columns['website_url'].append(record.website)
+        columns['website_status'].append(record.website_status)
+        columns['contact_email'].append(record.email)
+        tech_stack = record.tech_stack or {}
+        for key, column in TECH_STACK_COLUMNS.items():
+            columns[column].append(tech_stack.get(key))
+        columns['payment_methods'].append(encode_payment_methods(record.payment_methods))
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def to_frame(self):
+        df = pd.DataFrame(self.columns, columns=RECORD_COLUMNS)
+        for column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype('category')
+        df['google_rating'] = df['google_rating'].astype('float32')
+        df['review_count'] = df['review_count'].astype('Int32')
+        df['payment_methods'] = df['payment_methods'].astype('uint16')
+        return df
+
+    def flush(self, path):
+        """Write buffered records to {path}.pkl (typed) and {path}.csv, then empty the buffer"""
+        df = self.to_frame()
+        df.to_pickle(path + '.pkl')
+
+        # The CSV is for people, so spell the payment methods out
+        csv_df = df.copy()
+        csv_df['payment_methods'] = csv_df['payment_methods'].map(
+            lambda mask: ';'.join(decode_payment_methods(mask)))
+        csv_df.to_csv(path + '.csv', index=False)
+
+        self.clear()
+        return df
+
+def encode_payment_methods(payment_methods):
+    """Pack a list of payment methods into a PAYMENT_METHODS bitmask"""
+    mask = 0
+    for method in payment_methods or []:
+        mask |= 1 << PAYMENT_METHODS.index(method)
+    return mask
+
+def decode_payment_methods(mask):
+    """Unpack a PAYMENT_METHODS bitmask into a list of payment methods"""
+    return [method for bit, method in enumerate(PAYMENT_METHODS) if mask & (1 << bit)]
+
+def load_records(path):
+    """Load a flushed record file back with its column types intact"""
+    return pd.read_pickle(path)
+
+def parse_rating(text):
+    """Parse a Maps rating such as '4.5' or '4,5' into a float"""
+    try:
+        return float(text.strip().replace(',', '.'))
+    except (AttributeError, ValueError):
+        return None
+
+def parse_count(text):
+    """Parse a Maps review count such as '(1,234)' or '1,234 reviews' into an int"""
+    digits = re.sub(r'\D', '', text or '')
+    return int(digits) if digits else None
+
 def search_query(driver, query):
     logging.info(f"Searching for: {query}")
     
@@ -65,30 +313,29 @@ def search_query(driver, query):
     
     if business_data:
 
-        # Step 2: Extract emails by visiting websites
+        # Step 2: Drop dead/parked websites before the browser visits them
+        business_data = prefilter_websites(business_data)
+
+        # Step 3: Extract emails by visiting websites
         business_data = extract_emails_from_websites(driver, business_data)
         
-        # Step 3: Extract tech stack and payment methods
+        # Step 4: Extract tech stack and payment methods
         business_data = extract_advanced_info(driver, business_data)
 
         # Add category and county to each business record
         for business in business_data:
-            business['category'] = category
-            business['county'] = county
+            business.category = category
+            business.county = county
         
         # Create filename from query
         filename = query.lower().replace(",", "").replace(" ", "-").replace("'", "")
-        filename = re.sub(r"[^\w-]", "", filename) + ".csv"  # Remove special chars
+        filename = re.sub(r"[^\w-]", "", filename)  # Remove special chars
         
-        # Convert to DataFrame and save
-        df = pd.DataFrame(business_data)
-        
-        # Reorder columns to have category and county first
-        columns = ['category', 'county'] + [col for col in df.columns if col not in ['category', 'county']]
-        df = df[columns]
-        
-        df.to_csv(filename, index=False)
-        logging.info(f"Saved {len(business_data)} businesses to {filename}")
+        # Buffer as typed columns and save
+        buffer = RecordBuffer()
+        buffer.extend(business_data)
+        buffer.flush(filename)
+        logging.info(f"Saved {len(business_data)} businesses to {filename}.csv/.pkl")
     else:
         logging.warning(f"No businesses found for query: {query}")
     
@@ -208,16 +455,7 @@ def get_business_name(listing_element):
 
 def process_business_listing(driver, listing_element, business_name):
     """Process individual business listing"""
-    data = {
-        "Name": business_name,
-        "Rating": None,
-        "Address": None,
-        "Phone": None,
-        "Website": None,
-        "Email": None,
-        "TechStack": None,
-        "PaymentMethods": None
-    }
+    data = BusinessRecord(business_name)
 
     try:
         # Click to open details panel
@@ -233,28 +471,36 @@ def process_business_listing(driver, listing_element, business_name):
         
         # Rating
         try:
-            data["Rating"] = panel.find_element(
-                By.XPATH, './/div[contains(@class, "F7nice")]//span[1]').text
+            data.rating = parse_rating(panel.find_element(
+                By.XPATH, './/div[contains(@class, "F7nice")]//span[1]').text)
+        except NoSuchElementException:
+            pass
+
+        # Review count
+        try:
+            data.review_count = parse_count(panel.find_element(
+                By.XPATH, './/div[contains(@class, "F7nice")]//span[contains(@aria-label, "review")]'
+            ).get_attribute('aria-label'))
         except NoSuchElementException:
             pass
 
         # Address
         try:
-            data["Address"] = panel.find_element(
+            data.address = panel.find_element(
                 By.XPATH, './/button[contains(@data-item-id, "address")]//div[contains(@class, "fontBodyMedium")]').text
         except NoSuchElementException:
             pass
 
         # Phone
         try:
-            data["Phone"] = panel.find_element(
+            data.phone = panel.find_element(
                 By.XPATH, './/button[contains(@data-item-id, "phone")]//div[contains(@class, "fontBodyMedium")]').text
         except NoSuchElementException:
             pass
 
         # Website
         try:
-            data["Website"] = panel.find_element(
+            data.website = panel.find_element(
                 By.XPATH, './/a[contains(@data-item-id, "authority")]').get_attribute('href')
         except NoSuchElementException:
             pass
@@ -281,17 +527,184 @@ def process_business_listing(driver, listing_element, business_name):
 
     return data
 
+# Separate from the probe pool so a hung resolver cannot hold up probe workers
+DNS_EXECUTOR = ThreadPoolExecutor(max_workers=PROBE_WORKERS)
+
+def get_domain(url):
+    """Normalise a website URL to its bare domain for caching"""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+def is_shared_host(domain):
+    """Check whether a domain hosts many unrelated businesses by path"""
+    return any(domain == h or domain.endswith('.' + h) for h in SHARED_HOSTS)
+
+def load_dead_domain_cache(path=DEAD_DOMAIN_CACHE_FILE):
+    """Load the negative cache of dead/parked domains, dropping expired entries"""
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    now = time.time()
+    return {domain: entry for domain, entry in cache.items()
+            if not is_shared_host(domain) and now - entry.get('checked', 0) < (
+                TIMEOUT_TTL if entry.get('status') == 'timeout' else DEAD_DOMAIN_TTL)}
+
+def save_dead_domain_cache(cache, path=DEAD_DOMAIN_CACHE_FILE):
+    """Persist the negative cache of dead/parked domains"""
+    try:
+        with open(path, 'w') as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        logging.warning(f"Could not save dead domain cache: {e}")
+
+def build_probe_opener():
+    """Build a urllib opener that reaches websites the same way the browser does"""
+    if not PROBE_USE_PROXY:
+        return urllib.request.build_opener()
+    proxy_url = f"http://{quote(proxy_user, safe='')}:{quote(proxy_pass, safe='')}@{proxy_host}:{proxy_port}"
+    return urllib.request.build_opener(urllib.request.ProxyHandler({'http': proxy_url, 'https': proxy_url}))
+
+def probe_website(url, timeout=PROBE_TIMEOUT, opener=None):
+    """Check a website is live without a browser.
+
+    Returns a (status, final_url, headers, html) tuple where status is one of
+    'live', 'unresolved', 'unreachable', 'timeout' or 'parked'. A single GET with
+    a capped read is used so the same response can be fingerprinted.
+    """
+    opener = opener or build_probe_opener()
+    if '://' not in url:
+        url = 'http://' + url
+    host = urlparse(url).hostname
+    if not host:
+        return 'unresolved', url, None, ''
+
+    # DNS first - the cheapest way to spot expired domains. getaddrinfo has no
+    # timeout of its own, so bound it with a future
+    try:
+        DNS_EXECUTOR.submit(socket.getaddrinfo, host, None).result(timeout=timeout)
+    except FutureTimeoutError:
+        return 'timeout', url, None, ''
+    except socket.gaierror as e:
+        # A temporary resolver failure says nothing about the domain
+        if e.errno == socket.EAI_AGAIN:
+            return 'timeout', url, None, ''
+        return 'unresolved', url, None, ''
+    except UnicodeError:
+        return 'unresolved', url, None, ''
+
+    for attempt in range(PROBE_ATTEMPTS):
+        try:
+            request = urllib.request.Request(url, headers=PROBE_HEADERS)
+            with opener.open(request, timeout=timeout) as response:
+                # Redirects have already been followed, so this is the canonical URL
+                final_url = response.geturl()
+                headers = response.headers
+                html = response.read(PROBE_MAX_BYTES).decode('utf-8', errors='ignore')
+            break
+        except urllib.error.HTTPError as e:
+            # The host answered, so the domain is alive even if this page (a moved
+            # deep link, a 5xx blip, bot protection) is not - let the browser try it
+            return 'live', e.geturl() or url, e.headers, ''
+        except Exception as e:
+            reason = getattr(e, 'reason', e)
+            if isinstance(reason, (socket.timeout, TimeoutError)):
+                continue
+            # Only a refused or unroutable connection means nothing is there
+            if isinstance(reason, ConnectionRefusedError) or (
+                    isinstance(reason, OSError) and reason.errno in (errno.EHOSTUNREACH, errno.ENETUNREACH)):
+                return 'unreachable', url, None, ''
+            # TLS errors (e.g. missing intermediate certs), resets from WAFs and
+            # odd URLs may still load in Chrome, so let the browser decide
+            return 'live', url, None, ''
+    else:
+        return 'timeout', url, None, ''
+
+    final_domain = get_domain(final_url)
+    if any(final_domain == p or final_domain.endswith('.' + p) for p in PARKING_HOSTS):
+        return 'parked', final_url, headers, html
+    html_lower = html.lower()
+    if any(marker in html_lower for marker in PARKED_MARKERS):
+        return 'parked', final_url, headers, html
+
+    return 'live', final_url, headers, html
+
+def check_website(url, opener=None):
+    """Probe a website and fingerprint its tech stack from the same response"""
+    status, final_url, headers, html = probe_website(url, opener=opener)
+    # Bot-blocked and error responses carry the firewall's or error page's
+    # headers rather than the site's, so leave those for the browser pass
+    if status == 'live' and html:
+        return status, final_url, fingerprint_tech_stack(html, headers), match_signatures(html, headers)
+    return status, final_url, None, None
+
+def prefilter_websites(business_data, cache_path=DEAD_DOMAIN_CACHE_FILE):
+    """Probe all websites in a batch concurrently so the browser only opens live sites.
+
+    Live sites also get a TechStack fingerprinted from the probe response.
+    """
+    logging.info("Checking website reachability...")
+    cache = load_dead_domain_cache(cache_path)
+
+    to_probe = set()
+    for business in business_data:
+        website = business.website
+        if not website:
+            continue
+        cached = cache.get(get_domain(website))
+        if cached:
+            business.website_status = cached['status']
+        else:
+            to_probe.add(website)
+
+    opener = build_probe_opener()
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+        results = dict(zip(to_probe, executor.map(lambda url: check_website(url, opener), to_probe)))
+
+    # If nothing in a decent-sized batch answered, the probes themselves can't
+    # get out (e.g. no local DNS, or a proxy problem), so hand every site to the
+    # browser rather than filling the dead cache
+    if len(results) >= 3 and all(result[0] in ('unresolved', 'unreachable', 'timeout')
+                                 for result in results.values()):
+        logging.warning("All website probes failed - check network/proxy; skipping prefilter for this batch")
+        results = {url: ('live', url, None, None) for url in results}
+
+    now = time.time()
+    for business in business_data:
+        result = results.get(business.website)
+        if not result:
+            continue
+        status, final_url, tech_stack, http_tech_stack = result
+        business.website_status = status
+        if status == 'live':
+            business.website = final_url
+            business.tech_stack = tech_stack
+            business.http_tech_stack = http_tech_stack
+        else:
+            domain = get_domain(business.website)
+            if not is_shared_host(domain):
+                cache[domain] = {'status': status, 'checked': now}
+            logging.info(f"Skipping {status} website for {business.name}: {business.website}")
+
+    save_dead_domain_cache(cache, cache_path)
+    with_website = [b for b in business_data if b.website]
+    live = sum(1 for b in with_website if b.website_status == 'live')
+    logging.info(f"{live} of {len(with_website)} websites are live ({len(results)} probed)")
+    return business_data
+
 def extract_emails_from_websites(driver, business_data):
     """Extract emails by visiting websites after all basic info is collected"""
     logging.info("Starting email extraction from websites...")
     
     for index, business in enumerate(business_data):
-        if business['Website']:
+        if business.website and business.website_status == 'live':
             try:
-                logging.info(f"Checking website for {business['Name']} ({index+1}/{len(business_data)})")
+                logging.info(f"Checking website for {business.name} ({index+1}/{len(business_data)})")
                 
                 # Open website in new tab
-                driver.execute_script(f"window.open('{business['Website']}');")
+                driver.execute_script(f"window.open('{business.website}');")
                 driver.switch_to.window(driver.window_handles[-1])
                 time.sleep(5)  # Wait for page to load
                 
@@ -328,8 +741,8 @@ def extract_emails_from_websites(driver, business_data):
                         pass
                 
                 if emails:
-                    business['Email'] = emails[0]  # Take the first found email
-                    logging.info(f"Found email for {business['Name']}: {emails[0]}")
+                    business.email = emails[0]  # Take the first found email
+                    logging.info(f"Found email for {business.name}: {emails[0]}")
                 
                 # Close the tab and switch back to main window
                 driver.close()
@@ -337,7 +750,7 @@ def extract_emails_from_websites(driver, business_data):
                 time.sleep(2)
                 
             except Exception as e:
-                logging.error(f"Error checking website for {business['Name']}: {e}")
+                logging.error(f"Error checking website for {business.name}: {e}")
                 # Make sure we're back to the main window
                 if len(driver.window_handles) > 1:
                     driver.close()
@@ -345,8 +758,15 @@ def extract_emails_from_websites(driver, business_data):
     
     return business_data
 
-def detect_tech_stack(driver):
-    """Detect the technology stack of the current website"""
+def apply_signatures(tech_stack, value, signatures):
+    """Fill tech stack keys from every signature found in value"""
+    value = value.lower()
+    for needle, updates in signatures.items():
+        if needle in value:
+            tech_stack.update(updates)
+
+def fingerprint_tech_stack(html, headers=None):
+    """Detect the technology stack from page HTML and, if available, HTTP response headers"""
     tech_stack = {
         'CMS': None,
         'EcommercePlatform': None,
@@ -356,59 +776,88 @@ def detect_tech_stack(driver):
         'Analytics': None,
         'PaymentGateway': None
     }
+    html_lower = html.lower()
     
-    try:
-        # Get page source and HTML for analysis
-        html = driver.page_source
-        html_lower = html.lower()
-        
-        # Check for common CMS platforms
-        if 'wp-content' in html or 'wordpress' in html_lower:
-            tech_stack['CMS'] = 'WordPress'
-        elif 'shopify' in html_lower:
-            tech_stack['CMS'] = 'Shopify'
-            tech_stack['EcommercePlatform'] = 'Shopify'
-        elif 'magento' in html_lower:
-            tech_stack['CMS'] = 'Magento'
-            tech_stack['EcommercePlatform'] = 'Magento'
-        elif 'woocommerce' in html_lower:
-            tech_stack['EcommercePlatform'] = 'WooCommerce'
-        elif 'prestashop' in html_lower:
-            tech_stack['EcommercePlatform'] = 'PrestaShop'
-        elif 'bigcommerce' in html_lower:
-            tech_stack['EcommercePlatform'] = 'BigCommerce'
-        
-        # Check for JavaScript frameworks
-        if 'react' in html_lower or 'react-dom' in html_lower:
-            tech_stack['JavaScriptFramework'] = 'React'
-        elif 'vue' in html_lower:
-            tech_stack['JavaScriptFramework'] = 'Vue.js'
-        elif 'angular' in html_lower:
-            tech_stack['JavaScriptFramework'] = 'Angular'
-        
-        # Check for common payment gateways
-        if 'stripe' in html_lower:
-            tech_stack['PaymentGateway'] = 'Stripe'
-        elif 'paypal' in html_lower:
-            tech_stack['PaymentGateway'] = 'PayPal'
-        elif 'braintree' in html_lower:
-            tech_stack['PaymentGateway'] = 'Braintree'
-        elif 'authorize.net' in html_lower:
-            tech_stack['PaymentGateway'] = 'Authorize.net'
-        
-        # Check for analytics tools
-        if 'google-analytics' in html_lower or 'ga.js' in html_lower:
-            tech_stack['Analytics'] = 'Google Analytics'
-        elif 'gtag.js' in html_lower:
-            tech_stack['Analytics'] = 'Google Analytics (gtag)'
-        elif 'facebook-pixel' in html_lower:
-            tech_stack['Analytics'] = 'Facebook Pixel'
-        
-        # Clean up None values
-        tech_stack = {k: v for k, v in tech_stack.items() if v is not None}
-        
-        return tech_stack if tech_stack else None
+    # Check for common CMS platforms
+    if 'wp-content' in html or 'wordpress' in html_lower:
+        tech_stack['CMS'] = 'WordPress'
+    elif 'shopify' in html_lower:
+        tech_stack['CMS'] = 'Shopify'
+        tech_stack['EcommercePlatform'] = 'Shopify'
+    elif 'magento' in html_lower:
+        tech_stack['CMS'] = 'Magento'
+        tech_stack['EcommercePlatform'] = 'Magento'
+    elif 'woocommerce' in html_lower:
+        tech_stack['EcommercePlatform'] = 'WooCommerce'
+    elif 'prestashop' in html_lower:
+        tech_stack['EcommercePlatform'] = 'PrestaShop'
+    elif 'bigcommerce' in html_lower:
+        tech_stack['EcommercePlatform'] = 'BigCommerce'
     
+    # Check for JavaScript frameworks
+    if 'react' in html_lower or 'react-dom' in html_lower:
+        tech_stack['JavaScriptFramework'] = 'React'
+    elif 'vue' in html_lower:
+        tech_stack['JavaScriptFramework'] = 'Vue.js'
+    elif 'angular' in html_lower:
+        tech_stack['JavaScriptFramework'] = 'Angular'
+    
+    # Check for common payment gateways
+    if 'stripe' in html_lower:
+        tech_stack['PaymentGateway'] = 'Stripe'
+    elif 'paypal' in html_lower:
+        tech_stack['PaymentGateway'] = 'PayPal'
+    elif 'braintree' in html_lower:
+        tech_stack['PaymentGateway'] = 'Braintree'
+    elif 'authorize.net' in html_lower:
+        tech_stack['PaymentGateway'] = 'Authorize.net'
+    
+    # Check for analytics tools
+    if 'google-analytics' in html_lower or 'ga.js' in html_lower:
+        tech_stack['Analytics'] = 'Google Analytics'
+    elif 'gtag.js' in html_lower:
+        tech_stack['Analytics'] = 'Google Analytics (gtag)'
+    elif 'facebook-pixel' in html_lower:
+        tech_stack['Analytics'] = 'Facebook Pixel'
+    
+    # Headers, cookies, generator tags and asset URLs are more specific than
+    # the substring checks above, so they take precedence
+    tech_stack.update(match_signatures(html, headers))
+
+    # Clean up None values
+    tech_stack = {k: v for k, v in tech_stack.items() if v is not None}
+    
+    return tech_stack if tech_stack else None
+
+def match_signatures(html, headers=None):
+    """Detect technologies from response headers, cookies, generator tags and asset URLs only"""
+    tech_stack = {}
+
+    if headers is not None:
+        apply_signatures(tech_stack, headers.get('Server', ''), SERVER_SIGNATURES)
+        apply_signatures(tech_stack, headers.get('X-Powered-By', ''), POWERED_BY_SIGNATURES)
+        if headers.get('X-AspNet-Version'):
+            tech_stack['ProgrammingLanguage'] = 'ASP.NET'
+        if headers.get('X-Shopify-Stage') or headers.get('X-ShopId'):
+            tech_stack.update(CMS='Shopify', EcommercePlatform='Shopify')
+        for cookie in headers.get_all('Set-Cookie') or []:
+            cookie_name = cookie.split('=', 1)[0].strip()
+            apply_signatures(tech_stack, cookie_name, COOKIE_SIGNATURES)
+
+    for generator in re.findall(r'<meta[^>]+name=["\']generator["\'][^>]*>', html, re.IGNORECASE):
+        content = re.search(r'content=["\']([^"\']*)', generator, re.IGNORECASE)
+        if content:
+            apply_signatures(tech_stack, content.group(1), GENERATOR_SIGNATURES)
+
+    for asset in re.findall(r'<(?:script|link)[^>]+(?:src|href)=["\']([^"\']+)', html, re.IGNORECASE):
+        apply_signatures(tech_stack, asset, ASSET_SIGNATURES)
+
+    return tech_stack
+
+def detect_tech_stack(driver):
+    """Detect the technology stack of the current website"""
+    try:
+        return fingerprint_tech_stack(driver.page_source)
     except Exception as e:
         logging.warning(f"Error detecting tech stack: {e}")
         return None
@@ -416,28 +865,12 @@ def detect_tech_stack(driver):
 def detect_payment_methods(driver):
     """Detect payment methods on e-commerce sites"""
     payment_methods = []
-    payment_icons = {
-        'visa': ['visa', 'cc-visa'],
-        'mastercard': ['mastercard', 'cc-mastercard'],
-        'amex': ['american express', 'amex', 'cc-amex'],
-        'discover': ['discover', 'cc-discover'],
-        'paypal': ['paypal'],
-        'apple pay': ['apple pay'],
-        'google pay': ['google pay'],
-        'amazon pay': ['amazon pay'],
-        'klarna': ['klarna'],
-        'afterpay': ['afterpay'],
-        'bitcoin': ['bitcoin', 'crypto'],
-        'bank transfer': ['bank transfer', 'wire transfer'],
-        'cash on delivery': ['cash on delivery', 'cod']
-    }
-    
     try:
         # Get all text content from the page
         page_text = driver.find_element(By.TAG_NAME, "body").text.lower()
         
         # Check for payment method mentions in text
-        for method, keywords in payment_icons.items():
+        for method, keywords in PAYMENT_ICONS.items():
             if any(keyword in page_text for keyword in keywords):
                 payment_methods.append(method)
         
@@ -445,7 +878,7 @@ def detect_payment_methods(driver):
         img_alt_texts = [img.get_attribute('alt').lower() for img in driver.find_elements(By.TAG_NAME, "img") if img.get_attribute('alt')]
         img_srcs = [img.get_attribute('src').lower() for img in driver.find_elements(By.TAG_NAME, "img") if img.get_attribute('src')]
         
-        for method, keywords in payment_icons.items():
+        for method, keywords in PAYMENT_ICONS.items():
             # Check in alt texts
             if any(any(keyword in alt for keyword in keywords) for alt in img_alt_texts):
                 if method not in payment_methods:
@@ -458,7 +891,7 @@ def detect_payment_methods(driver):
         # Check footer specifically
         try:
             footer = driver.find_element(By.TAG_NAME, "footer").text.lower()
-            for method, keywords in payment_icons.items():
+            for method, keywords in PAYMENT_ICONS.items():
                 if any(keyword in footer for keyword in keywords):
                     if method not in payment_methods:
                         payment_methods.append(method)
@@ -477,7 +910,7 @@ def detect_payment_methods(driver):
                 time.sleep(3)
                 
                 checkout_text = driver.find_element(By.TAG_NAME, "body").text.lower()
-                for method, keywords in payment_icons.items():
+                for method, keywords in PAYMENT_ICONS.items():
                     if any(keyword in checkout_text for keyword in keywords):
                         if method not in payment_methods:
                             payment_methods.append(method)
@@ -498,25 +931,35 @@ def extract_advanced_info(driver, business_data):
     logging.info("Starting advanced info extraction from websites...")
     
     for index, business in enumerate(business_data):
-        if business['Website']:
+        # Only needed for this pass, so don't keep it around until the flush
+        http_tech_stack = business.http_tech_stack or {}
+        business.http_tech_stack = None
+
+        if business.website and business.website_status == 'live':
             try:
-                logging.info(f"Checking website for {business['Name']} ({index+1}/{len(business_data)})")
+                # Skip the browser only when the probe positively identified a
+                # non-shop CMS; everything else needs the rendered page
+                if http_tech_stack.get('CMS') and not (business.tech_stack or {}).get('EcommercePlatform'):
+                    continue
+
+                logging.info(f"Checking website for {business.name} ({index+1}/{len(business_data)})")
                 
                 # Open website in new tab
-                driver.execute_script(f"window.open('{business['Website']}');")
+                driver.execute_script(f"window.open('{business.website}');")
                 driver.switch_to.window(driver.window_handles[-1])
                 time.sleep(5)  # Wait for page to load
                 
-                # Extract tech stack
-                tech_stack = detect_tech_stack(driver)
+                # Rendered detection replaces the probe's substring guesses, but
+                # header, cookie, generator and asset matches still take precedence
+                tech_stack = {**(detect_tech_stack(driver) or {}), **http_tech_stack}
                 if tech_stack:
-                    business['TechStack'] = tech_stack
+                    business.tech_stack = tech_stack
                 
                 # Detect payment methods if it's an e-commerce site
                 if tech_stack and tech_stack.get('EcommercePlatform'):
                     payment_methods = detect_payment_methods(driver)
                     if payment_methods:
-                        business['PaymentMethods'] = payment_methods
+                        business.payment_methods = payment_methods
                 
                 # Close the tab and switch back to main window
                 driver.close()
@@ -524,7 +967,7 @@ def extract_advanced_info(driver, business_data):
                 time.sleep(2)
                 
             except Exception as e:
-                logging.error(f"Error checking website for {business['Name']}: {e}")
+                logging.error(f"Error checking website for {business.name}: {e}")
                 # Make sure we're back to the main window
                 if len(driver.window_handles) > 1:
                     driver.close()